@@ -1,12 +1,28 @@
 #!/usr/bin/env python3
 """ Executable for game of life """
+import argparse
+import sys
+
 import game_of_life
 
 SIZE_X, SIZE_Y = 80, 30
 
 
-def main():
-    """ Main function """
+def parse_args():
+    """ Parse the command line arguments """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("mode", nargs="?", default="play",
+                        choices=["play", "serve", "watch"],
+                        help="play locally, serve a world to viewers or watch a served world")
+    parser.add_argument("--host", default=game_of_life.STREAM_HOST)
+    parser.add_argument("--port", type=int, default=game_of_life.STREAM_PORT)
+    parser.add_argument("--timestep", type=float, default=0.2,
+                        help="seconds between generations when serving")
+    return parser.parse_args()
+
+
+def play():
+    """ Play game of life in the terminal """
     game = game_of_life.CursesGame(size_x=SIZE_X, size_y=SIZE_Y,
                                    max_size=True)
     game.print_world()
@@ -16,5 +32,41 @@ def main():
         game.print_world()
 
 
+def serve(args):
+    """ Simulate a random world and stream it to viewers """
+    world = game_of_life.World(SIZE_X, SIZE_Y, randomize=True)
+    try:
+        server = game_of_life.FrameServer(world, args.host, args.port)
+    except OSError as error:
+        sys.exit("Could not serve on {}:{}: {}".format(args.host, args.port, error))
+    server.start()
+    print("Serving on {}:{}".format(*server.address))
+    try:
+        server.run(timestep=args.timestep)
+    finally:
+        server.close()
+
+
+def watch(args):
+    """ Watch a world served by another game of life """
+    try:
+        game = game_of_life.StreamGame(args.host, args.port, size_x=SIZE_X, size_y=SIZE_Y,
+                                       max_size=True)
+    except OSError as error:
+        sys.exit("Could not connect to {}:{}: {}".format(args.host, args.port, error))
+    game.watch()
+
+
+def main():
+    """ Main function """
+    args = parse_args()
+    if args.mode == "serve":
+        serve(args)
+    elif args.mode == "watch":
+        watch(args)
+    else:
+        play()
+
+
 if __name__ == "__main__":
     main()
@@ -1,13 +1,18 @@
 """ Conways game of life in python """
 import curses
-import time
+import json
+import queue
 import random
 import signal
+import socket
+import socketserver
 import sys
+import threading
+import time
 from itertools import product, chain
 
 # pylint: disable=unused-import
-from typing import Dict, Tuple, NewType, Any, Set, Callable, Iterable, List
+from typing import Dict, Tuple, NewType, Any, Set, Callable, Iterable, List, Optional
 # pylint: enable=unused-import
 
 # pylint: disable=invalid-name
@@ -17,10 +22,23 @@ Pos = Tuple[int, int]
 DEAD_SYMBOL = '-'
 ALIVE_SYMBOL = '#'
 
+# Side length of the square tiles that frames are grouped into when streaming
+TILE_SIZE = 16
+STREAM_HOST = '127.0.0.1'
+STREAM_PORT = 7337
+# Largest width and height of a viewport a viewer may subscribe to
+MAX_VIEWPORT_SIZE = 1024
+# Longest viewport request in bytes, viewers sending longer lines are disconnected
+MAX_VIEWPORT_LINE = 1024
+
 
 def signal_handler(_sig, _frame):
     """ Make Ctrl-c exit close curses window """
-    curses.endwin()
+    try:
+        curses.endwin()
+    except curses.error:
+        # Curses was never started, e.g. when serving a world
+        pass
     sys.exit(0)
 
 
@@ -142,6 +160,253 @@ class World:
         return len(self.world)
 
 
+def tile_of(pos: Pos) -> Pos:
+    """ Return the tile that the cell at @pos belongs to """
+    return (pos[0] // TILE_SIZE, pos[1] // TILE_SIZE)
+
+
+def tiles_in_view(top_left: Pos, bottom_right: Pos) -> Set[Pos]:
+    """ Return all tiles overlapping the viewport between @top_left and @bottom_right """
+    left, top = tile_of(top_left)
+    right, bottom = tile_of(bottom_right)
+    return set(product(range(left, right + 1), range(top, bottom + 1)))
+
+
+def parse_viewport(line: bytes) -> Set[Pos]:
+    """ Parse a viewport request into the tiles it covers
+
+    Viewports larger than MAX_VIEWPORT_SIZE are clamped, malformed or inverted
+    viewports raise ValueError.
+    """
+    try:
+        viewport = json.loads(line.decode("UTF-8"))
+        (left, top), (right, bottom) = viewport["top_left"], viewport["bottom_right"]
+    except (KeyError, TypeError) as error:
+        raise ValueError("Malformed viewport: {!r}".format(line)) from error
+    if not all(isinstance(value, int) for value in (left, top, right, bottom)):
+        raise ValueError("Viewport corners must be integers: {!r}".format(line))
+    if right < left or bottom < top:
+        raise ValueError("Inverted viewport: {!r}".format(line))
+    right = min(right, left + MAX_VIEWPORT_SIZE - 1)
+    bottom = min(bottom, top + MAX_VIEWPORT_SIZE - 1)
+    return tiles_in_view((left, top), (right, bottom))
+
+
+def encode_frame(generation: int, born: Iterable[Pos], died: Iterable[Pos]) -> bytes:
+    """ Encode the births and deaths of a generation as one line, grouped per tile """
+    tiles = {}  # type: Dict[Pos, Tuple[List[Pos], List[Pos]]]
+    for index, cells in enumerate((born, died)):
+        for cell in cells:
+            tiles.setdefault(tile_of(cell), ([], []))[index].append(cell)
+    frame = {"generation": generation,
+             "tiles": [[tile[0], tile[1], sorted(tile_born), sorted(tile_died)]
+                       for tile, (tile_born, tile_died) in sorted(tiles.items())]}
+    return json.dumps(frame, separators=(',', ':')).encode("UTF-8") + b"\n"
+
+
+def decode_frame(line: bytes) -> Tuple[int, Set[Pos], Set[Pos]]:
+    """ Decode a line created by encode_frame into (generation, born, died) """
+    frame = json.loads(line.decode("UTF-8"))
+    born = set()  # type: Set[Pos]
+    died = set()  # type: Set[Pos]
+    for _tile_x, _tile_y, tile_born, tile_died in frame["tiles"]:
+        born.update((x, y) for x, y in tile_born)
+        died.update((x, y) for x, y in tile_died)
+    return frame["generation"], born, died
+
+
+class FrameBroadcaster:
+    """ Holds the latest generation of a world for viewers to pick up
+
+    Publishing only replaces the latest frame, so a slow viewer skips ahead to
+    the newest generation instead of holding back the simulation.
+    """
+    def __init__(self) -> None:
+        self.condition = threading.Condition()
+        self.generation = 0
+        self.tiles = {}  # type: Dict[Pos, Set[Pos]]
+        self.closed = False
+
+    def publish(self, generation: int, cells: Iterable[Pos]) -> None:
+        """ Make @cells the latest generation and wake up all viewers """
+        tiles = {}  # type: Dict[Pos, Set[Pos]]
+        for cell in cells:
+            tiles.setdefault(tile_of(cell), set()).add(cell)
+        with self.condition:
+            self.generation = generation
+            self.tiles = tiles
+            self.condition.notify_all()
+
+    def close(self) -> None:
+        """ Tell all viewers that no more generations are coming """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class _ViewerHandler(socketserver.StreamRequestHandler):
+    """ Streams frames to one viewer and listens for its viewport changes """
+
+    def setup(self) -> None:
+        super().setup()
+        self.broadcaster = self.server.broadcaster  # type: ignore
+        self.view = None  # type: Optional[Set[Pos]]
+        self.view_changed = False
+        self.disconnected = False
+
+    def read_viewports(self) -> None:
+        """ Read viewport updates from the viewer until it disconnects """
+        try:
+            while True:
+                line = self.rfile.readline(MAX_VIEWPORT_LINE)
+                if not line or not line.endswith(b"\n"):
+                    break
+                try:
+                    view = parse_viewport(line)
+                except ValueError:
+                    # Keep the previous viewport
+                    continue
+                with self.broadcaster.condition:
+                    self.view = view
+                    self.view_changed = True
+                    self.broadcaster.condition.notify_all()
+        except OSError:
+            pass
+        with self.broadcaster.condition:
+            self.disconnected = True
+            self.broadcaster.condition.notify_all()
+
+    def handle(self) -> None:
+        """ Send the viewer the changes of its visible tiles since its last frame """
+        reader = threading.Thread(target=self.read_viewports, daemon=True)
+        reader.start()
+        sent_generation = -1
+        sent = {}  # type: Dict[Pos, Set[Pos]]
+        broadcaster = self.broadcaster
+        while True:
+            with broadcaster.condition:
+                # Nothing is sent until the viewer has told us what it is looking at
+                broadcaster.condition.wait_for(
+                    lambda: (broadcaster.closed or self.disconnected
+                             or (self.view is not None
+                                 and (self.view_changed
+                                      or broadcaster.generation != sent_generation))))
+                generation, tiles, view = broadcaster.generation, broadcaster.tiles, self.view
+                if broadcaster.closed or self.disconnected or view is None:
+                    return
+                self.view_changed = False
+
+            born = set()  # type: Set[Pos]
+            died = set()  # type: Set[Pos]
+            # Only tiles with live cells now or in the last frame can have changed
+            for tile in (tiles.keys() & view) | sent.keys():
+                new = tiles.get(tile, set()) if tile in view else set()
+                old = sent.pop(tile, set())
+                born |= new - old
+                died |= old - new
+                if new:
+                    sent[tile] = new
+            try:
+                self.wfile.write(encode_frame(generation, born, died))
+            except OSError:
+                return
+            sent_generation = generation
+
+
+class _FrameTCPServer(socketserver.ThreadingTCPServer):
+    """ TCP server with one thread per viewer """
+    daemon_threads = True
+    allow_reuse_address = True
+    # Let dozens of viewers connect at once without their connections being dropped
+    request_queue_size = 128
+
+    def __init__(self, address: Tuple[str, int], broadcaster: FrameBroadcaster) -> None:
+        self.broadcaster = broadcaster
+        super().__init__(address, _ViewerHandler)
+
+
+class FrameServer:
+    """ Runs one world and streams its generations to local viewers """
+    def __init__(self, world: World, host: str = STREAM_HOST, port: int = STREAM_PORT) -> None:
+        self.world = world
+        self.generation = 0
+        self.broadcaster = FrameBroadcaster()
+        self.broadcaster.publish(self.generation, self.world.world)
+        self._server = _FrameTCPServer((host, port), self.broadcaster)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """ The (host, port) viewers should connect to """
+        host, port = self._server.server_address[:2]
+        return str(host), int(port)
+
+    def start(self) -> None:
+        """ Start accepting viewers in the background """
+        self._thread.start()
+
+    def step(self) -> None:
+        """ Update the world one generation and publish it """
+        self.world.update()
+        self.generation += 1
+        self.broadcaster.publish(self.generation, self.world.world)
+
+    def run(self, steps: Optional[int] = None, timestep: float = 0.2) -> None:
+        """ Publish 'steps' more generations, or forever if steps is None """
+        step = 0
+        while steps is None or step < steps:
+            self.step()
+            step += 1
+            time.sleep(timestep)
+
+    def close(self) -> None:
+        """ Disconnect all viewers and stop the server """
+        self.broadcaster.close()
+        # shutdown waits for serve_forever, which only runs once started
+        if self._thread.is_alive():
+            self._server.shutdown()
+        self._server.server_close()
+
+
+class FrameClient:
+    """ Connection to a FrameServer, keeping a local copy of the visible world """
+    def __init__(self, host: str = STREAM_HOST, port: int = STREAM_PORT,
+                 timeout: Optional[float] = None) -> None:
+        self.socket = socket.create_connection((host, port), timeout)
+        self.rfile = self.socket.makefile("rb")
+        self.world = World(randomize=False)
+        self.generation = -1
+
+    def set_viewport(self, top_left: Pos, bottom_right: Pos) -> None:
+        """ Ask the server for the cells between @top_left and @bottom_right """
+        viewport = {"top_left": top_left, "bottom_right": bottom_right}
+        self.socket.sendall(json.dumps(viewport).encode("UTF-8") + b"\n")
+
+    def read_frame(self) -> Tuple[int, Set[Pos], Set[Pos]]:
+        """ Block until the next frame arrives and return it decoded """
+        line = self.rfile.readline()
+        if not line:
+            raise ConnectionError("Server closed the connection")
+        return decode_frame(line)
+
+    def apply_frame(self, frame: Tuple[int, Set[Pos], Set[Pos]]) -> None:
+        """ Apply the births and deaths of @frame to the local world """
+        generation, born, died = frame
+        self.world.world -= died
+        self.world.world |= born
+        self.generation = generation
+
+    def receive(self) -> int:
+        """ Read and apply the next frame, return its generation """
+        self.apply_frame(self.read_frame())
+        return self.generation
+
+    def close(self) -> None:
+        """ Close the connection to the server """
+        self.rfile.close()
+        self.socket.close()
+
+
 class Game:
     """ Class handling the user interface """
     def __init__(self, size_x: int = 20, size_y: int = 20, randomize: bool = True) -> None:
@@ -316,4 +581,78 @@ class ScreenGame(Game):
         pass
 
 
+class StreamGame(CursesGame):
+    """ Curses viewer of a world simulated by a FrameServer """
+
+    def __init__(self,
+                 host: str = STREAM_HOST,
+                 port: int = STREAM_PORT,
+                 size_x: int = 20,
+                 size_y: int = 20,
+                 max_size: bool = False) -> None:
+        # Connect before starting curses so a missing server leaves the terminal intact
+        self.client = FrameClient(host, port)
+        super().__init__(size_x, size_y, randomize=False, max_size=max_size)
+        self.world = self.client.world
+        self.frames = queue.Queue()  # type: queue.Queue
+        self.client.set_viewport(self.top_corner, self.bottom_corner)
+        threading.Thread(target=self.receive_frames, daemon=True).start()
+
+    def receive_frames(self) -> None:
+        """ Queue frames from the server until the connection closes """
+        try:
+            while True:
+                self.frames.put(self.client.read_frame())
+        except (OSError, ValueError):
+            self.frames.put(None)
+
+    def apply_frames(self) -> bool:
+        """ Apply all queued frames, return False if the server went away """
+        while True:
+            try:
+                frame = self.frames.get_nowait()
+            except queue.Empty:
+                return True
+            if frame is None:
+                return False
+            self.client.apply_frame(frame)
+
+    def handle_command(self, command: int) -> None:
+        """ Handle the same commands as Game, except that the server owns the world
+            so space and r do nothing
+        """
+        if command == ord(" ") or command == ord("r"):
+            return
+        viewport = (self.top_corner, self.bottom_corner)
+        super().handle_command(command)
+        if viewport == (self.top_corner, self.bottom_corner):
+            return
+        try:
+            self.client.set_viewport(self.top_corner, self.bottom_corner)
+        except OSError:
+            self.exit("Server closed the connection", 1)
+
+    def print_world(self) -> None:
+        """ Clear the screen before printing, the visible part of the world may be empty """
+        self.screen.erase()
+        self.screen.border(0)
+        super().print_world()
+
+    def watch(self, timestep: float = 0.05) -> None:
+        """ Show frames from the server while handling user commands """
+        self.screen.timeout(int(timestep * 1000))
+        while True:
+            if not self.apply_frames():
+                self.exit("Server closed the connection", 1)
+            self.print_world()
+            command = self.get_command_from_user()
+            if command != -1:
+                self.handle_command(command)
+
+    def kill(self) -> None:
+        """ Close the connection and the curses window """
+        self.client.close()
+        super().kill()
+
+
 signal.signal(signal.SIGINT, signal_handler)
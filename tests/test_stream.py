@@ -0,0 +1,269 @@
+""" Tests for streaming a world to viewers """
+
+# pylint: disable=no-self-use
+# pylint: disable=missing-docstring
+# pylint: disable=redefined-outer-name
+# pylint: disable=invalid-name
+
+import json
+import socket
+import threading
+import time
+
+import pytest  # type: ignore
+
+from .context import game_of_life as gol
+
+
+NUM_CLIENTS = 32
+TOP_LEFT, BOTTOM_RIGHT = (0, 0), (40, 40)
+
+
+class DriftingWorld(gol.World):
+    """ World moving every cell one step down and to the right each generation """
+    def __init__(self, cells):
+        super().__init__(randomize=False)
+        self.world = set(cells)
+
+    def update(self):
+        self.world = {(x + 1, y + 1) for x, y in self.world}
+
+
+class BlinkingWorld(gol.World):
+    """ World flipping between two checkerboards, every cell changes each generation """
+    def __init__(self, size_x, size_y):
+        super().__init__(randomize=False)
+        self.boards = [{(x, y) for x in range(size_x) for y in range(size_y) if (x + y) % 2 == parity}
+                       for parity in (0, 1)]
+        self.world = set(self.boards[0])
+
+    def update(self):
+        self.boards.reverse()
+        self.world = set(self.boards[0])
+
+
+def visible(world, top_left, bottom_right):
+    tiles = gol.tiles_in_view(top_left, bottom_right)
+    return {cell for cell in world.world if gol.tile_of(cell) in tiles}
+
+
+def catch_up(client, generation):
+    while client.generation < generation:
+        client.receive()
+
+
+@pytest.fixture
+def server():
+    server = gol.FrameServer(gol.World(40, 40, randomize=True), port=0)
+    server.start()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def drifting_server():
+    server = gol.FrameServer(DriftingWorld([(0, 0), (1, 0), (0, 2)]), port=0)
+    server.start()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def blinking_server():
+    server = gol.FrameServer(BlinkingWorld(gol.TILE_SIZE, gol.TILE_SIZE), port=0)
+    server.start()
+    yield server
+    server.close()
+
+
+def connect(server, top_left=TOP_LEFT, bottom_right=BOTTOM_RIGHT):
+    client = gol.FrameClient(*server.address, timeout=10)
+    client.set_viewport(top_left, bottom_right)
+    return client
+
+
+class TestFrames:
+
+    def test_encode_decode_roundtrip(self):
+        born = {(0, 0), (17, -3), (-40, 100)}
+        died = {(1, 1), (32, 32)}
+        assert gol.decode_frame(gol.encode_frame(7, born, died)) == (7, born, died)
+
+    def test_frame_is_one_line(self):
+        frame = gol.encode_frame(1, {(0, 0)}, {(100, 100)})
+        assert frame.endswith(b"\n") and frame.count(b"\n") == 1
+
+    def test_cells_are_grouped_per_tile(self):
+        line = gol.encode_frame(1, {(0, 0), (1, 1), (gol.TILE_SIZE, 0)}, set())
+        assert line.count(b"[0,0,") == 1 and line.count(b"[1,0,") == 1
+
+    @pytest.mark.parametrize("pos, tile",
+                             [((0, 0), (0, 0)),
+                              ((gol.TILE_SIZE - 1, gol.TILE_SIZE), (0, 1)),
+                              ((-1, -gol.TILE_SIZE - 1), (-1, -2))])
+    def test_tile_of(self, pos, tile):
+        assert gol.tile_of(pos) == tile
+
+    def test_parse_viewport(self):
+        line = json.dumps({"top_left": [0, -1], "bottom_right": [gol.TILE_SIZE, 0]}).encode()
+        assert gol.parse_viewport(line) == {(0, -1), (1, -1), (0, 0), (1, 0)}
+
+    @pytest.mark.parametrize("line",
+                             [b'{"top_left": [0, 0]}',
+                              b'{"top_left": 0, "bottom_right": [1, 1]}',
+                              b'{"top_left": [0, 0], "bottom_right": ["a", 1]}',
+                              b'{"top_left": [5, 5], "bottom_right": [0, 0]}',
+                              b'[0, 0, 1, 1]',
+                              b'not json'])
+    def test_parse_invalid_viewport_raises_value_error(self, line):
+        with pytest.raises(ValueError):
+            gol.parse_viewport(line)
+
+    def test_parse_huge_viewport_is_clamped(self):
+        tiles = gol.parse_viewport(b'{"top_left": [0, 0], "bottom_right": [20000, 20000]}')
+        assert tiles == gol.tiles_in_view((0, 0), (gol.MAX_VIEWPORT_SIZE - 1,
+                                                   gol.MAX_VIEWPORT_SIZE - 1))
+
+    def test_tiles_in_view(self):
+        tiles = gol.tiles_in_view((-1, 0), (gol.TILE_SIZE, 0))
+        assert tiles == {(-1, 0), (0, 0), (1, 0)}
+
+
+class TestFrameServer:
+
+    def test_client_receives_initial_world(self, server):
+        client = connect(server)
+        catch_up(client, 0)
+        assert client.world.world == visible(server.world, TOP_LEFT, BOTTOM_RIGHT)
+        client.close()
+
+    def test_client_follows_cells_across_tiles(self, drifting_server):
+        client = connect(drifting_server, (0, 0), (100, 100))
+        steps = 4 * gol.TILE_SIZE
+        for _ in range(steps):
+            drifting_server.step()
+        catch_up(client, steps)
+        assert client.world.world == {(steps, steps), (steps + 1, steps), (steps, steps + 2)}
+        assert {gol.tile_of(cell) for cell in client.world.world} == {(4, 4)}
+        client.close()
+
+    def test_close_before_start_returns(self):
+        server = gol.FrameServer(gol.World(randomize=False), port=0)
+        closer = threading.Thread(target=server.close, daemon=True)
+        closer.start()
+        closer.join(5)
+        assert not closer.is_alive()
+
+    def test_too_long_viewport_line_disconnects(self, server):
+        client = gol.FrameClient(*server.address, timeout=10)
+        client.socket.sendall(b"x" * (gol.MAX_VIEWPORT_LINE + 1))
+        with pytest.raises(ConnectionError):
+            client.read_frame()
+        client.close()
+
+    def test_invalid_viewport_is_ignored(self, server):
+        client = connect(server)
+        catch_up(client, 0)
+        client.socket.sendall(b'{"top_left": [0, 0]}\n')
+        server.step()
+        catch_up(client, 1)
+        assert client.world.world == visible(server.world, TOP_LEFT, BOTTOM_RIGHT)
+        client.close()
+
+    def test_huge_viewport_is_clamped(self, server):
+        client = connect(server, (-20000, -20000), (20000, 20000))
+        catch_up(client, 0)
+        assert not client.world
+        client.close()
+
+    def test_run_publishes_steps_each_call(self, server):
+        server.run(3, timestep=0)
+        server.run(3, timestep=0)
+        assert server.generation == 6
+
+    def test_moving_viewport_drops_and_adds_tiles(self, server):
+        client = connect(server)
+        catch_up(client, 0)
+        outside = (10 * gol.TILE_SIZE, 10 * gol.TILE_SIZE)
+        client.set_viewport(outside, outside)
+        client.receive()
+        assert not client.world
+        client.set_viewport(TOP_LEFT, BOTTOM_RIGHT)
+        client.receive()
+        assert client.world.world == visible(server.world, TOP_LEFT, BOTTOM_RIGHT)
+        client.close()
+
+    def test_many_clients_connect_quickly(self, server):
+        start = time.perf_counter()
+        clients = [connect(server) for _ in range(NUM_CLIENTS)]
+        for client in clients:
+            catch_up(client, 0)
+        elapsed = time.perf_counter() - start
+        for client in clients:
+            client.close()
+        # A dropped connection is retried after a second
+        assert elapsed < 0.5
+
+    def test_many_clients_throughput(self, blinking_server):
+        steps = 50
+        start = time.perf_counter()
+        clients = [connect(blinking_server) for _ in range(NUM_CLIENTS)]
+        for client in clients:
+            catch_up(client, 0)
+        # Wait for every viewer before the next step, so every frame is delivered
+        for generation in range(1, steps + 1):
+            blinking_server.step()
+            for client in clients:
+                assert client.receive() == generation
+        elapsed = time.perf_counter() - start
+        expected = visible(blinking_server.world, TOP_LEFT, BOTTOM_RIGHT)
+        for client in clients:
+            assert client.world.world == expected
+            client.close()
+        assert elapsed < 3
+
+    def test_blocked_client_does_not_hold_back_others(self):
+        size_x, size_y = 128, 64
+        server = gol.FrameServer(BlinkingWorld(size_x, size_y), port=0)
+        server.start()
+        # A viewer with a tiny receive buffer that does not read until the end,
+        # every frame holds all of its cells so its handler blocks on writing
+        slow = socket.socket()
+        slow.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024)
+        slow.settimeout(10)
+        try:
+            slow.connect(server.address)
+            slow.sendall('{{"top_left": [0, 0], "bottom_right": [{}, {}]}}\n'.format(
+                size_x - 1, size_y - 1).encode())
+            client = connect(server, (0, 0), (0, 0))
+            steps = 100
+            for _ in range(steps):
+                server.step()
+            catch_up(client, steps)
+            assert client.world.world == visible(server.world, (0, 0), (0, 0))
+            client.close()
+
+            frames = 0
+            generation = -1
+            rfile = slow.makefile("rb")
+            while generation < steps:
+                generation, _born, _died = gol.decode_frame(rfile.readline())
+                frames += 1
+            # All frames would be received if the handler never blocked
+            assert frames < steps + 1
+            rfile.close()
+        finally:
+            slow.close()
+            server.close()
+
+    def test_slow_client_gets_coalesced_frames(self, server):
+        client = connect(server)
+        catch_up(client, 0)
+        steps = 50
+        # Keep the viewer from picking up any frame until all steps are published
+        with server.broadcaster.condition:
+            for _ in range(steps):
+                server.step()
+        assert client.receive() == steps
+        assert client.world.world == visible(server.world, TOP_LEFT, BOTTOM_RIGHT)
+        client.close()